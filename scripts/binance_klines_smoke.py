@@ -1,22 +1,41 @@
 from __future__ import annotations
 
-import json
 import urllib.parse
 import urllib.request
 from datetime import datetime, timezone
 
+try:
+    import httpx
+except ImportError:  # httpx is optional, as in the feed; fall back to urllib
+    httpx = None
 
-def fetch_klines(symbol: str, interval: str, limit: int = 10):
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+KLINES_URL = "https://api.binance.com/api/v3/klines"
+
+
+def fetch_klines(client, symbol: str, interval: str, limit: int = 10):
     params = urllib.parse.urlencode({"symbol": symbol, "interval": interval, "limit": int(limit)})
-    url = f"https://api.binance.com/api/v3/klines?{params}"
+    url = f"{KLINES_URL}?{params}"
+    if client is not None:
+        r = client.get(url)
+        r.raise_for_status()
+        return _json.loads(r.content)
     with urllib.request.urlopen(url, timeout=10) as resp:
-        return json.loads(resp.read())
+        return _json.loads(resp.read())
 
 
 def main() -> int:
     symbol = "BTCUSDT"
     interval = "15m"
-    klines = fetch_klines(symbol, interval, limit=10)
+    if httpx is not None:
+        with httpx.Client(http2=True, timeout=10.0) as client:
+            klines = fetch_klines(client, symbol, interval, limit=10)
+    else:
+        klines = fetch_klines(None, symbol, interval, limit=10)
     if not klines:
         print("no klines returned")
         return 1
@@ -1,24 +1,136 @@
 from __future__ import annotations
 
-import json
+import http.client
+import ssl
+import threading
 import time
 import urllib.parse
-import urllib.error
-import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Callable, Dict, Iterable, List, Optional, Set
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
 
-import pandas as pd
+import numpy as np
+
+try:
+    import httpx
+except ImportError:  # fall back to stdlib keep-alive connections (_StdlibKeepAlive)
+    httpx = None
+
+try:
+    import orjson as _json
+except ImportError:  # optional speedup; stdlib json parses the same payloads
+    import json as _json
 
 from .config import BinanceConfig
-from .strategy_engine import PineParityEngine, Signal
+from .strategy_engine import KlineBatch, PineParityEngine, Signal
 from .timeframes import to_binance_interval
 from .utils.logger import setup_logger
+from .utils.time_utils import now_ms
 
 log = setup_logger("binance_feed")
 
+# Upper bound on concurrent symbol polls, to stay well inside Binance's REST limits.
+MAX_POLL_WORKERS = 8
+
+# Wait this long past an expected bar close before polling, so the venue has published it.
+BAR_CLOSE_SLACK_S = 0.5
+
+_KLINE_DTYPE = np.dtype(
+    [
+        ("open_time", "i8"),
+        ("open", "f8"),
+        ("high", "f8"),
+        ("low", "f8"),
+        ("close", "f8"),
+        ("volume", "f8"),
+        ("close_time", "i8"),
+        ("quote_volume", "f8"),
+        ("num_trades", "i8"),
+        ("taker_base_vol", "f8"),
+        ("taker_quote_vol", "f8"),
+    ]
+)
+
+# exchangeInfo statuses that still accept kline requests.
+_ACTIVE_STATUSES = frozenset({"TRADING", "PRE_TRADING", "PENDING_TRADING"})
+
+_INTERVAL_UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def _interval_ms(interval: str) -> int:
+    return int(interval[:-1]) * _INTERVAL_UNIT_MS[interval[-1]]
+
+
+class _StdlibKeepAlive:
+    """Keep-alive GETs over http.client, used when httpx is not installed.
+
+    http.client connections are not thread-safe, so each thread keeps its own
+    connection per host. When a reused connection fails, it is rebuilt and the
+    request retried once.
+    """
 
-@dataclass
+    def __init__(self, timeout: float = 10.0):
+        self._timeout = timeout
+        self._ssl = ssl.create_default_context()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # Every live connection across threads, so close() can reach them all.
+        self._all: Set[http.client.HTTPConnection] = set()
+
+    def _conn(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        conns = getattr(self._local, "conns", None)
+        if conns is None:
+            conns = self._local.conns = {}
+        c = conns.get((scheme, netloc))
+        if c is None:
+            if scheme == "https":
+                c = http.client.HTTPSConnection(netloc, timeout=self._timeout, context=self._ssl)
+            else:
+                c = http.client.HTTPConnection(netloc, timeout=self._timeout)
+            conns[(scheme, netloc)] = c
+            with self._lock:
+                self._all.add(c)
+        return c
+
+    def _drop(self, scheme: str, netloc: str) -> None:
+        c = self._local.conns.pop((scheme, netloc), None)
+        if c is not None:
+            with self._lock:
+                self._all.discard(c)
+            c.close()
+
+    def _get_once(self, scheme: str, netloc: str, target: str) -> Tuple[int, str, bytes]:
+        c = self._conn(scheme, netloc)
+        try:
+            c.request("GET", target, headers={"Connection": "keep-alive"})
+            resp = c.getresponse()
+            return resp.status, resp.reason, resp.read()
+        except Exception:
+            self._drop(scheme, netloc)
+            raise
+
+    def get(self, url: str) -> Tuple[int, str, bytes]:
+        u = urllib.parse.urlsplit(url)
+        target = f"{u.path}?{u.query}" if u.query else u.path
+        conns = getattr(self._local, "conns", None)
+        reused = conns is not None and (u.scheme, u.netloc) in conns
+        try:
+            return self._get_once(u.scheme, u.netloc, target)
+        except (http.client.HTTPException, OSError):
+            # A stale keep-alive socket fails in many ways (RemoteDisconnected,
+            # ssl.SSLError, EPIPE, ...); a fresh connection's failure is real.
+            if not reused:
+                raise
+            return self._get_once(u.scheme, u.netloc, target)
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._all = self._all, set()
+        for c in conns:
+            c.close()
+
+
+@dataclass(slots=True)
 class BinanceSignal:
     signal: Signal
     atr: Optional[float]
@@ -39,179 +151,226 @@ class BinanceFeedRunner:
         self.cfg = cfg
         self.engine = engine
         self.interval = to_binance_interval(timeframe)
+        self._interval_ms = _interval_ms(self.interval)
+        # 1m bars needed for the CVD proxy window (engine config is fixed after init).
+        self._m1_limit = min(1000, max(int(getattr(engine.cfg, "cvdLenMin", 60)) + 10, 200))
+
+        # Venue and endpoints are fixed for the runner's lifetime.
+        self._venue = str(cfg.venue or "spot").lower().strip()
+        if cfg.api_base:
+            api_base = cfg.api_base.rstrip("/")
+        elif self._venue == "usdm":
+            api_base = "https://fapi.binance.com"
+        else:
+            api_base = "https://api.binance.com"
+        api_prefix = "/fapi/v1" if self._venue == "usdm" else "/api/v3"
+        self._kline_url_prefix = f"{api_base}{api_prefix}/klines?"
+        self._exchange_info_url = f"{api_base}{api_prefix}/exchangeInfo"
+        self._kline_urls: Dict[Tuple[str, str, int], str] = {}
         self.last_close_ms: Dict[str, int] = {}
-        self._valid_symbols: Optional[Set[str]] = None
+        # Swapped wholesale (never mutated) so poll threads can read it lock-free.
+        self._valid_symbols: Optional[FrozenSet[str]] = None
         self._valid_symbols_ts: float = 0.0
         self._exchangeinfo_ttl_s: float = 60.0 * 60.0
+        # One pooled keep-alive client for the runner's lifetime, so polls reuse
+        # the TCP/TLS connection to the REST host instead of re-handshaking.
+        if httpx is not None:
+            self._http = httpx.Client(
+                http2=True,
+                timeout=10.0,
+                limits=httpx.Limits(max_keepalive_connections=8, max_connections=16, keepalive_expiry=30),
+            )
+        else:
+            self._http = _StdlibKeepAlive(timeout=10.0)
+        # Runs the 1m fetch alongside the TF fetch when a new bar is due.
+        self._prefetch = ThreadPoolExecutor(max_workers=MAX_POLL_WORKERS, thread_name_prefix="binance-m1")
+        # At most one outstanding 1m prefetch per symbol, kept across retries
+        # until the TF close it was issued for is published.
+        self._m1_pending: Dict[str, Future] = {}
+        self._closed = threading.Event()
 
-    def _venue(self) -> str:
-        return str(self.cfg.venue or "spot").lower().strip()
-
-    def _api_base(self) -> str:
-        if self.cfg.api_base:
-            return self.cfg.api_base.rstrip("/")
-        if self._venue() == "usdm":
-            return "https://fapi.binance.com"
-        return "https://api.binance.com"
-
-    def _kline_path(self) -> str:
-        if self._venue() == "usdm":
-            return "/fapi/v1/klines"
-        return "/api/v3/klines"
-
-    def _exchange_info_path(self) -> str:
-        if self._venue() == "usdm":
-            return "/fapi/v1/exchangeInfo"
-        return "/api/v3/exchangeInfo"
+    def close(self) -> None:
+        self._closed.set()
+        self._prefetch.shutdown(wait=False, cancel_futures=True)
+        self._http.close()
 
     def _fetch_json(self, url: str):
-        try:
-            with urllib.request.urlopen(url, timeout=10) as resp:
-                raw = resp.read()
-            return json.loads(raw)
-        except urllib.error.HTTPError as e:
-            try:
-                body = e.read().decode("utf-8", errors="ignore")
-            except Exception:
-                body = ""
-            raise RuntimeError(f"HTTP {e.code} {e.reason} url={url} body={body[:300]}") from e
+        if httpx is not None:
+            r = self._http.get(url)
+            status, reason, body = r.status_code, r.reason_phrase, r.content
+        else:
+            status, reason, body = self._http.get(url)
+        if not 200 <= status < 300:
+            text = body[:300].decode("utf-8", errors="ignore")
+            raise RuntimeError(f"HTTP {status} {reason} url={url} body={text}")
+        return _json.loads(body)
 
     def _fetch_klines(self, symbol: str, interval: str, limit: int):
-        limit = min(int(limit), 1000)
-        params = urllib.parse.urlencode(
-            {
-                "symbol": symbol,
-                "interval": interval,
-                "limit": int(limit),
-            }
-        )
-        url = f"{self._api_base()}{self._kline_path()}?{params}"
+        key = (symbol, interval, limit)
+        url = self._kline_urls.get(key)
+        if url is None:
+            # Binance symbols and intervals are alphanumeric, so no quoting is needed.
+            url = f"{self._kline_url_prefix}symbol={symbol}&interval={interval}&limit={min(int(limit), 1000)}"
+            self._kline_urls[key] = url
         return self._fetch_json(url)
 
-    def _get_valid_symbols(self, force: bool = False) -> Set[str]:
+    def _get_valid_symbols(self, force: bool = False) -> FrozenSet[str]:
         now = time.time()
         if (not force) and self._valid_symbols is not None and (now - self._valid_symbols_ts) < self._exchangeinfo_ttl_s:
             return self._valid_symbols
-        url = f"{self._api_base()}{self._exchange_info_path()}"
-        data = self._fetch_json(url)
+        data = self._fetch_json(self._exchange_info_url)
         syms: Set[str] = set()
         for s in data.get("symbols", []) if isinstance(data, dict) else []:
-            sym = s.get("symbol")
-            status = str(s.get("status", "")).upper()
-            if sym and status in ("TRADING", "PRE_TRADING", "PENDING_TRADING"):
-                syms.add(str(sym))
-        self._valid_symbols = syms
+            status = s.get("status")
+            if status and status.upper() in _ACTIVE_STATUSES and (sym := s.get("symbol")):
+                syms.add(sym)
+        valid = frozenset(syms)
+        self._valid_symbols = valid
         self._valid_symbols_ts = now
-        return syms
+        return valid
+
+    def _refresh_symbols_loop(self) -> None:
+        # Keeps exchangeInfo fresh off the poll path; on failure the previous set stays.
+        while not self._closed.wait(self._exchangeinfo_ttl_s):
+            try:
+                self._get_valid_symbols(force=True)
+            except Exception as e:
+                log.warning("exchangeInfo refresh failed err=%s", e)
 
     def _validate_symbols(self, symbols: Iterable[str]) -> List[str]:
+        symbols = list(symbols)
         try:
             valid = self._get_valid_symbols()
         except Exception as e:
-            log.warning(f"exchangeInfo fetch failed; skipping symbol validation err={e}")
-            return list(symbols)
-        ok: List[str] = []
-        bad: List[str] = []
-        for s in symbols:
-            (ok if s in valid else bad).append(s)
+            log.warning("exchangeInfo fetch failed; skipping symbol validation err=%s", e)
+            return symbols
+        ok = [s for s in symbols if s in valid]
+        bad = [s for s in symbols if s not in valid]
         if bad:
             hint = ""
-            if self._venue() == "spot":
+            if self._venue == "spot":
                 hint = " (Hint: metals like XAGUSDT/XAUUSDT are Futures; set binance.venue=usdm)"
-            log.error(f"Invalid Binance symbols for venue={self._venue()}: {bad}{hint}")
+            log.error("Invalid Binance symbols for venue=%s: %s%s", self._venue, bad, hint)
         return ok
 
     @staticmethod
-    def _klines_to_df(klines) -> pd.DataFrame:
-        cols = [
-            "open_time",
-            "open",
-            "high",
-            "low",
-            "close",
-            "volume",
-            "close_time",
-            "quote_volume",
-            "num_trades",
-            "taker_base_vol",
-            "taker_quote_vol",
-            "ignore",
-        ]
-        df = pd.DataFrame(klines, columns=cols)
-        if df.empty:
-            return df
-        for col in ["open", "high", "low", "close", "volume"]:
-            df[col] = df[col].astype(float)
-        df["open_time"] = df["open_time"].astype(int)
-        df["close_time"] = df["close_time"].astype(int)
-        df["tick_volume"] = df["volume"]
-        return df
-
-    def _m1_limit(self) -> int:
-        cvd_len = int(getattr(self.engine.cfg, "cvdLenMin", 60))
-        return min(1000, max(cvd_len + 10, 200))
+    def _klines_to_batch(klines) -> KlineBatch:
+        # Binance sends prices/volumes as strings; convert each row once, straight
+        # into a typed record array, and hand its columns out as views.
+        arr = np.array(
+            [
+                (
+                    int(k[0]),
+                    float(k[1]),
+                    float(k[2]),
+                    float(k[3]),
+                    float(k[4]),
+                    float(k[5]),
+                    int(k[6]),
+                    float(k[7]),
+                    int(k[8]),
+                    float(k[9]),
+                    float(k[10]),
+                )
+                for k in klines
+            ],
+            dtype=_KLINE_DTYPE,
+        )
+        batch = {name: arr[name] for name in _KLINE_DTYPE.names}
+        batch["tick_volume"] = batch["volume"]
+        return batch
 
-    def poll_symbol(self, symbol: str) -> Optional[BinanceSignal]:
-        if self._valid_symbols is not None and symbol not in self._valid_symbols:
-            return None
+    def _fetch_tf_batch(self, symbol: str) -> Optional[KlineBatch]:
         try:
             klines = self._fetch_klines(symbol, self.interval, self.cfg.limit)
         except Exception as e:
-            log.error(f"fetch klines failed symbol={symbol} interval={self.interval} err={e}")
+            log.error("fetch klines failed symbol=%s interval=%s err=%s", symbol, self.interval, e)
             return None
         if not isinstance(klines, list):
-            log.error(f"fetch klines bad response symbol={symbol} interval={self.interval}")
+            log.error("fetch klines bad response symbol=%s interval=%s", symbol, self.interval)
             return None
 
-        df_tf = self._klines_to_df(klines)
-        if len(df_tf) < 3:
+        tf = self._klines_to_batch(klines)
+        if len(tf["close_time"]) < 3:
             return None
+        return tf
 
-        last_closed = df_tf.iloc[-2]
-        close_time_ms = int(last_closed["close_time"])
-        prev = self.last_close_ms.get(symbol)
-        if prev is not None and close_time_ms <= prev:
+    def poll_symbol(self, symbol: str) -> Optional[BinanceSignal]:
+        if self._valid_symbols is not None and symbol not in self._valid_symbols:
+            return None
+
+        # If the wall clock says the next TF bar has closed, its 1m bars will be
+        # needed too, so request them in parallel with the TF klines. While the
+        # venue lags, retries reuse the one prefetch instead of issuing more.
+        prev = self.last_close_ms.get(symbol, -1)
+        if now_ms() > prev + self._interval_ms and symbol not in self._m1_pending:
+            self._m1_pending[symbol] = self._prefetch.submit(self._fetch_klines, symbol, "1m", self._m1_limit)
+
+        tf = self._fetch_tf_batch(symbol)
+        close_time_ms = int(tf["close_time"][-2]) if tf is not None else None
+        if close_time_ms is None or close_time_ms <= prev:
             return None
         self.last_close_ms[symbol] = close_time_ms
+        m1_fut = self._m1_pending.pop(symbol, None)
 
-        log.info(
-            f"BINANCE_BAR_CLOSE symbol={symbol} tf={self.interval} close_ms={close_time_ms}"
-        )
+        log.info("BINANCE_BAR_CLOSE symbol=%s tf=%s close_ms=%d", symbol, self.interval, close_time_ms)
 
-        df_tf_closed = df_tf.iloc[:-1].copy()
+        tf_closed = {k: v[:-1] for k, v in tf.items()}
 
+        m1_klines = None
+        if m1_fut is not None:
+            try:
+                m1_klines = m1_fut.result()
+            except Exception as e:
+                log.warning("prefetch m1 failed symbol=%s err=%s", symbol, e)
         try:
-            m1_klines = self._fetch_klines(symbol, "1m", self._m1_limit())
+            # The last 1m row is the forming candle; if it is not past the TF close,
+            # the prefetch ran before the bar was published and is repeated once.
+            if not (isinstance(m1_klines, list) and m1_klines and int(m1_klines[-1][6]) > close_time_ms):
+                m1_klines = self._fetch_klines(symbol, "1m", self._m1_limit)
         except Exception as e:
-            log.error(f"fetch m1 failed symbol={symbol} err={e}")
+            log.error("fetch m1 failed symbol=%s err=%s", symbol, e)
             return None
         if not isinstance(m1_klines, list):
-            log.error(f"fetch m1 bad response symbol={symbol}")
+            log.error("fetch m1 bad response symbol=%s", symbol)
             return None
 
-        df_1m = self._klines_to_df(m1_klines)
-        if df_1m.empty:
-            return None
-        df_1m = df_1m[df_1m["close_time"] <= close_time_ms].copy()
-        if len(df_1m) < 10:
+        m1 = self._klines_to_batch(m1_klines)
+        # Klines come back in ascending time order, so the cut is a sorted lookup + views.
+        end = int(np.searchsorted(m1["close_time"], close_time_ms, side="right"))
+        m1 = {k: v[:end] for k, v in m1.items()}
+        if len(m1["close_time"]) < 10:
             return None
 
         bar_close_ms = close_time_ms + 1
         sig = self.engine.on_tf_bar_close(
-            symbol=symbol, df_tf=df_tf_closed, df_1m=df_1m, bar_close_ms=bar_close_ms
+            symbol=symbol, tf_bars=tf_closed, m1_bars=m1, bar_close_ms=bar_close_ms
         )
         if not sig:
             return None
 
-        atr_val = None
-        try:
-            atr_series = PineParityEngine._atr(df_tf_closed, 14)
-            if len(atr_series) > 0:
-                atr_val = float(atr_series.iloc[-1])
-        except Exception:
-            atr_val = None
+        return BinanceSignal(signal=sig, atr=sig.atr_at_close, close_time_ms=close_time_ms)
 
-        return BinanceSignal(signal=sig, atr=atr_val, close_time_ms=close_time_ms)
+    def _next_poll_delay(self, symbols: List[str], retry_s: float) -> float:
+        # Sleep until the earliest symbol's next bar is due; any symbol still
+        # waiting on its current bar (or never seen) polls again after retry_s.
+        valid = self._valid_symbols
+        next_close = None
+        for sym in symbols:
+            if valid is not None and sym not in valid:
+                continue
+            last = self.last_close_ms.get(sym)
+            if last is None:
+                return retry_s
+            due = last + self._interval_ms
+            if next_close is None or due < next_close:
+                next_close = due
+        if next_close is None:
+            return retry_s
+        wait_s = (next_close - now_ms()) / 1000.0
+        if wait_s <= 0:
+            return retry_s
+        return max(0.2, wait_s + BAR_CLOSE_SLACK_S)
 
     def run_forever(
         self,
@@ -221,16 +380,22 @@ class BinanceFeedRunner:
     ) -> None:
         ps = float(poll_seconds) if poll_seconds is not None else float(self.cfg.poll_seconds)
         symbols = self._validate_symbols(symbols)
-        log.info(f"Binance master running. venue={self._venue()} interval={self.interval} symbols={symbols}")
+        log.info("Binance master running. venue=%s interval=%s symbols=%s", self._venue, self.interval, symbols)
         if not symbols:
             while True:
                 time.sleep(60.0)
-        while True:
-            for sym in symbols:
-                try:
-                    out = self.poll_symbol(sym)
-                    if out:
-                        on_signal(out)
-                except Exception as e:
-                    log.error(f"poll error symbol={sym}: {e}")
-            time.sleep(ps)
+        threading.Thread(target=self._refresh_symbols_loop, name="binance-exchangeinfo", daemon=True).start()
+        # Symbols are polled concurrently (the work is all HTTP round-trips), but
+        # signals are still dispatched from this thread, in symbol order.
+        workers = min(len(symbols), MAX_POLL_WORKERS)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="binance-poll") as pool:
+            while True:
+                futures = [(sym, pool.submit(self.poll_symbol, sym)) for sym in symbols]
+                for sym, fut in futures:
+                    try:
+                        out = fut.result()
+                        if out:
+                            on_signal(out)
+                    except Exception as e:
+                        log.error("poll error symbol=%s: %s", sym, e)
+                time.sleep(self._next_poll_delay(symbols, ps))
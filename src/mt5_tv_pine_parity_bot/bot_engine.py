@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Optional
 
 import MetaTrader5 as mt5
@@ -56,7 +58,15 @@ def run(config_path: str) -> int:
     bridge = MT5Bridge(cfg.mt5.login, cfg.mt5.password, cfg.mt5.server, cfg.mt5.path)
     bridge.connect()
 
+    # All MT5 calls after connect() (orders and trade tracking) run on this one
+    # thread: the MetaTrader5 package is not thread-safe, and this keeps the
+    # blocking calls off the TV server's event loop.
+    mt5_exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5")
+
     tg = TelegramNotifier(cfg.telegram)
+    notify_entry = cfg.telegram.enabled and cfg.telegram.notify_entry
+    notify_failures = cfg.telegram.enabled and cfg.telegram.notify_failures
+    notify_rejects = cfg.telegram.enabled and cfg.telegram.notify_rejects
     tracker = TradeTracker(
         tg,
         enabled=cfg.trade_tracker.enabled,
@@ -64,14 +74,19 @@ def run(config_path: str) -> int:
         history_days=cfg.trade_tracker.history_days,
         magic=cfg.risk.magic,
     )
-    tracker.start()
 
     last_tv_confirm: Dict[str, int] = {}
     last_binance_confirm: Dict[str, int] = {}
 
     # Compute expected TF once, log it once (so you KNOW what the service is enforcing)
     expected_tf = _effective_expected_tf(cfg)
-    log.info(f"Config: mode={cfg.mode} paper={cfg.paper} require_tf_match={cfg.tv_bridge.require_tf_match} expected_tf={expected_tf}")
+    log.info(
+        "Config: mode=%s paper=%s require_tf_match=%s expected_tf=%s",
+        cfg.mode,
+        cfg.paper,
+        cfg.tv_bridge.require_tf_match,
+        expected_tf,
+    )
     if cfg.telegram.enabled and cfg.telegram.notify_startup:
         tg.send(
             f"BOT ONLINE\nMode: {cfg.mode}\nPaper: {cfg.paper}\nTF: {cfg.timeframe}\nSymbols: {', '.join(cfg.symbols)}",
@@ -80,15 +95,11 @@ def run(config_path: str) -> int:
 
     def _atr_hint(symbol: str) -> Optional[float]:
         try:
-            import pandas as pd
-            from .strategy_engine import PineParityEngine as PPE
-
+            # MT5 rates are a structured ndarray; _atr reads its high/low/close fields in place.
             rates = bridge.copy_rates(symbol, mt5_tf(cfg.timeframe), 250)
-            df = pd.DataFrame(rates)
-            if len(df) > 50:
-                atr_series = PPE._atr(df, 14)
-                # last closed bar = -2
-                return float(atr_series.iloc[-2])
+            if len(rates) > 50:
+                # last closed bar = -2, so drop the forming one
+                return PineParityEngine._atr(rates[:-1], 14)
         except Exception:
             return None
         return None
@@ -103,15 +114,15 @@ def run(config_path: str) -> int:
         tf: Optional[str],
     ):
         if entry_price is None:
-            log.error(f"Cannot execute: missing entry_price for {symbol}")
-            if cfg.telegram.enabled and cfg.telegram.notify_failures:
+            log.error("Cannot execute: missing entry_price for %s", symbol)
+            if notify_failures:
                 tg.send(f"EXEC FAIL\nMode: {cfg.mode}\n{symbol} LONG\nmissing entry_price", key=f"fail:{symbol}")
             return
 
         if bridge.has_open_position(symbol, cfg.risk.magic):
             msg = f"SKIP already in position\n{symbol} LONG"
             log.warning(msg)
-            if cfg.telegram.enabled and cfg.telegram.notify_failures:
+            if notify_failures:
                 tg.send(msg, key=f"skip:{symbol}")
             return
 
@@ -135,7 +146,7 @@ def run(config_path: str) -> int:
         )
 
         if res.ok:
-            log.info(f"EXEC OK symbol={symbol} retcode={res.retcode} comment={res.comment} order={res.order}")
+            log.info("EXEC OK symbol=%s retcode=%s comment=%s order=%s", symbol, res.retcode, res.comment, res.order)
             risk_ccy = None
             try:
                 if sl is not None:
@@ -149,7 +160,7 @@ def run(config_path: str) -> int:
                         )
                     )
             except Exception as e:
-                log.warning(f"risk calc failed: {e}")
+                log.warning("risk calc failed: %s", e)
 
             meta = TradeMeta(
                 mode=cfg.mode,
@@ -168,7 +179,7 @@ def run(config_path: str) -> int:
             )
             tracker.register_open(meta)
 
-            if cfg.telegram.enabled and cfg.telegram.notify_entry:
+            if notify_entry:
                 tg.send(
                     "ENTRY\n"
                     f"Mode: {meta.mode} | Source: {meta.source}\n"
@@ -181,8 +192,8 @@ def run(config_path: str) -> int:
                     key=f"entry:{symbol}",
                 )
         else:
-            log.error(f"EXEC FAIL symbol={symbol} retcode={res.retcode} comment={res.comment}")
-            if cfg.telegram.enabled and cfg.telegram.notify_failures:
+            log.error("EXEC FAIL symbol=%s retcode=%s comment=%s", symbol, res.retcode, res.comment)
+            if notify_failures:
                 tg.send(
                     f"EXEC FAIL\nMode: {cfg.mode}\n{symbol} LONG\nretcode={res.retcode}\n{res.comment}",
                     key=f"fail:{symbol}",
@@ -193,46 +204,58 @@ def run(config_path: str) -> int:
 
         # Dedupe on confirm_time_ms per-symbol (prevents double-fires)
         if sig.confirm_time_ms is not None:
-            prev = last_tv_confirm.get(mt5_symbol)
-            if prev is not None and sig.confirm_time_ms == prev:
-                log.info(f"TV dedupe ignored symbol={mt5_symbol} confirm_time_ms={sig.confirm_time_ms}")
+            if sig.confirm_time_ms == last_tv_confirm.get(mt5_symbol):
+                log.info("TV dedupe ignored symbol=%s confirm_time_ms=%s", mt5_symbol, sig.confirm_time_ms)
                 return
             last_tv_confirm[mt5_symbol] = sig.confirm_time_ms
 
-        log.info(f"TV SIGNAL LONG symbol={mt5_symbol} entry={sig.entry_price} tf={sig.tf} confirm_time_ms={sig.confirm_time_ms}")
-        execute_long(
+        log.info(
+            "TV SIGNAL LONG symbol=%s entry=%s tf=%s confirm_time_ms=%s",
             mt5_symbol,
             sig.entry_price,
-            atr_hint=None,
-            confirm_time_ms=sig.confirm_time_ms,
-            source="TV",
-            tf=sig.tf or expected_tf or cfg.timeframe,
+            sig.tf,
+            sig.confirm_time_ms,
+        )
+        await asyncio.get_running_loop().run_in_executor(
+            mt5_exec,
+            functools.partial(
+                execute_long,
+                mt5_symbol,
+                sig.entry_price,
+                atr_hint=None,
+                confirm_time_ms=sig.confirm_time_ms,
+                source="TV",
+                tf=sig.tf or expected_tf or cfg.timeframe,
+            ),
         )
 
     def on_binance_signal(out: BinanceSignal):
         sig = out.signal
         mt5_symbol = _map_symbol(cfg, sig.symbol)
         if sig.confirm_time_ms is not None:
-            prev = last_binance_confirm.get(mt5_symbol)
-            if prev is not None and sig.confirm_time_ms == prev:
-                log.info(f"BINANCE dedupe ignored symbol={mt5_symbol} confirm_time_ms={sig.confirm_time_ms}")
+            if sig.confirm_time_ms == last_binance_confirm.get(mt5_symbol):
+                log.info("BINANCE dedupe ignored symbol=%s confirm_time_ms=%s", mt5_symbol, sig.confirm_time_ms)
                 return
             last_binance_confirm[mt5_symbol] = sig.confirm_time_ms
         log.info(
-            f"BINANCE SIGNAL LONG symbol={mt5_symbol} entry={sig.entry_price} confirm_time_ms={sig.confirm_time_ms}"
+            "BINANCE SIGNAL LONG symbol=%s entry=%s confirm_time_ms=%s",
+            mt5_symbol,
+            sig.entry_price,
+            sig.confirm_time_ms,
         )
-        execute_long(
+        mt5_exec.submit(
+            execute_long,
             mt5_symbol,
             sig.entry_price,
             atr_hint=out.atr,
             confirm_time_ms=sig.confirm_time_ms,
             source="BINANCE",
             tf=cfg.timeframe,
-        )
+        ).result()
 
     async def run_tv_server():
         async def on_reject(reason: str, payload: Dict[str, Any], ip: str):
-            if not cfg.telegram.enabled or not cfg.telegram.notify_rejects:
+            if not notify_rejects:
                 return
             summary_keys = ["symbol", "side", "tf", "confirm_time_ms", "entry_price", "price"]
             parts = []
@@ -253,6 +276,7 @@ def run(config_path: str) -> int:
             on_signal=on_tv,
             on_reject=on_reject,
         )
+        tracker.start(asyncio.get_running_loop(), executor=mt5_exec)
         while True:
             await asyncio.sleep(3600)
 
@@ -260,7 +284,11 @@ def run(config_path: str) -> int:
         engine = PineParityEngine(tf=cfg.timeframe, cfg=cfg.strategy)
         runner = BinanceFeedRunner(cfg=cfg.binance, engine=engine, timeframe=cfg.timeframe)
         syms = [str(s).upper() for s in cfg.symbols]
-        runner.run_forever(syms, on_signal=on_binance_signal, poll_seconds=cfg.binance.poll_seconds)
+        tracker.start(executor=mt5_exec)
+        try:
+            runner.run_forever(syms, on_signal=on_binance_signal, poll_seconds=cfg.binance.poll_seconds)
+        finally:
+            runner.close()
 
     try:
         mode = cfg.mode.lower().strip()
@@ -281,6 +309,8 @@ def run(config_path: str) -> int:
     finally:
         try:
             tracker.stop()
+            mt5_exec.shutdown(wait=True, cancel_futures=True)
             bridge.shutdown()
         except Exception:
             pass
+        tg.close()
@@ -2,13 +2,18 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _YamlLoader
+
 from .telegram_notify import TelegramConfig
 
-@dataclass
+@dataclass(slots=True)
 class TVBridgeConfig:
     enabled: bool
     host: str
@@ -17,14 +22,14 @@ class TVBridgeConfig:
     secret: str
     require_tf_match: bool = True
 
-@dataclass
+@dataclass(slots=True)
 class MT5Config:
     login: int
     password: str
     server: str
     path: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class StrategyConfig:
     donLen: int = 120
     pivotLen: int = 5
@@ -50,7 +55,7 @@ class StrategyConfig:
     bosAtrBuffer: float = 0.10
     maxWaitBars: int = 30
 
-@dataclass
+@dataclass(slots=True)
 class RiskConfig:
     lot: float = 0.01
     sl_atr_mult: float = 1.5
@@ -59,20 +64,20 @@ class RiskConfig:
     magic: int = 260110
     comment: str = "TV/MT5 PineParity LONG"
 
-@dataclass
+@dataclass(slots=True)
 class TradeTrackerConfig:
     enabled: bool = False
     poll_seconds: float = 1.0
     history_days: int = 7
 
-@dataclass
+@dataclass(slots=True)
 class BinanceConfig:
     venue: str = "spot"
     poll_seconds: float = 1.0
     limit: int = 500
     api_base: str = ""
 
-@dataclass
+@dataclass(slots=True)
 class AppConfig:
     mode: str
     paper: bool
@@ -88,10 +93,27 @@ class AppConfig:
     trade_tracker: TradeTrackerConfig = field(default_factory=TradeTrackerConfig)
     binance: BinanceConfig = field(default_factory=BinanceConfig)
 
+# resolved path -> ((st_mtime_ns, st_size), parsed config)
+_CFG_CACHE: Dict[str, Tuple[Tuple[int, int], AppConfig]] = {}
+
 def load_config(path: str) -> AppConfig:
-    p = Path(path)
-    raw = yaml.safe_load(p.read_text(encoding="utf-8"))
+    """Load the YAML config at path.
+
+    The parsed AppConfig is cached per file and reused until the file's
+    mtime or size changes, so callers share one instance and should treat
+    it as read-only.
+    """
+    p = Path(path).resolve()
+    st = p.stat()
+    stamp = (st.st_mtime_ns, st.st_size)
+    hit = _CFG_CACHE.get(str(p))
+    if hit is not None and hit[0] == stamp:
+        return hit[1]
+    cfg = _parse_config(yaml.load(p.read_bytes(), Loader=_YamlLoader))
+    _CFG_CACHE[str(p)] = (stamp, cfg)
+    return cfg
 
+def _parse_config(raw: Any) -> AppConfig:
     # Backwards compatible: allow expected_tv_tf or expected_tf
     if isinstance(raw, dict):
         if "expected_tf" not in raw and "expected_tv_tf" in raw:
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Set
 
 import MetaTrader5 as mt5
 
@@ -9,7 +9,7 @@ from .utils.logger import setup_logger
 
 log = setup_logger("mt5")
 
-@dataclass
+@dataclass(slots=True)
 class OrderResult:
     ok: bool
     retcode: int
@@ -22,8 +22,11 @@ class MT5Bridge:
         self.password = password
         self.server = server
         self.path = path
+        # Symbols already verified/selected in the terminal for this session.
+        self._selected: Set[str] = set()
 
     def connect(self) -> None:
+        self._selected.clear()
         if self.path:
             ok = mt5.initialize(self.path, login=self.login, password=self.password, server=self.server)
         else:
@@ -35,18 +38,21 @@ class MT5Bridge:
         acc = mt5.account_info()
         if acc is None:
             raise RuntimeError("MT5 account_info() failed")
-        log.info(f"Connected to MT5: login={acc.login} broker={acc.company} balance={acc.balance}")
+        log.info("Connected to MT5: login=%s broker=%s balance=%s", acc.login, acc.company, acc.balance)
 
     def shutdown(self) -> None:
         mt5.shutdown()
 
     def ensure_symbol(self, symbol: str) -> None:
+        if symbol in self._selected:
+            return
         info = mt5.symbol_info(symbol)
         if info is None:
             raise RuntimeError(f"MT5 symbol not found: {symbol}")
         if not info.visible:
             if not mt5.symbol_select(symbol, True):
                 raise RuntimeError(f"Failed to select symbol: {symbol}")
+        self._selected.add(symbol)
 
     def get_tick(self, symbol: str):
         tick = mt5.symbol_info_tick(symbol)
@@ -71,7 +77,7 @@ class MT5Bridge:
         price = float(tick.ask)
 
         if paper:
-            log.info(f"[PAPER] BUY {symbol} lot={lot} price~{price} sl={sl} tp={tp}")
+            log.info("[PAPER] BUY %s lot=%s price~%s sl=%s tp=%s", symbol, lot, price, sl, tp)
             return OrderResult(ok=True, retcode=0, comment="PAPER", order=0)
 
         req = {
@@ -103,6 +109,7 @@ class MT5Bridge:
         self.ensure_symbol(symbol)
         rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, count)
         if rates is None:
+            self._selected.discard(symbol)  # re-check selection on the next call
             raise RuntimeError(f"copy_rates_from_pos failed for {symbol} tf={timeframe}")
         return rates
 
@@ -110,17 +117,14 @@ class MT5Bridge:
         self.ensure_symbol(symbol)
         val = mt5.order_calc_profit(order_type, symbol, float(lot), float(price_open), float(price_close))
         if val is None:
+            self._selected.discard(symbol)
             raise RuntimeError(f"order_calc_profit failed for {symbol}")
         return float(val)
 
     def has_open_position(self, symbol: str, magic: int) -> bool:
-        pos = mt5.positions_get(symbol=symbol)
-        if not pos:
-            return False
-        for p in pos:
-            try:
-                if int(getattr(p, "magic", 0)) == int(magic) and str(getattr(p, "symbol", "")) == symbol:
-                    return True
-            except Exception:
-                continue
+        # positions_get(symbol=...) already filters by symbol; only magic is left.
+        m = int(magic)
+        for p in mt5.positions_get(symbol=symbol) or ():
+            if p.magic == m:
+                return True
         return False
@@ -3,7 +3,7 @@ from __future__ import annotations
 import time
 from typing import Dict, Optional
 
-import pandas as pd
+import numpy as np
 
 from .mt5_bridge import MT5Bridge
 from .strategy_engine import PineParityEngine, Signal
@@ -14,9 +14,6 @@ from .utils.logger import setup_logger
 
 log = setup_logger("mt5_feed")
 
-def _rates_to_df(rates) -> pd.DataFrame:
-    return pd.DataFrame(rates)
-
 class MT5FeedRunner:
     def __init__(
         self,
@@ -40,6 +37,8 @@ class MT5FeedRunner:
         self.last_stale_warn_ms: Dict[str, int] = {}
         self.stale_threshold_ms = 30 * 60 * 1000
         self.stale_warn_every_ms = 5 * 60 * 1000
+        self._thr_min = self.stale_threshold_ms / 60000.0
+        self._notify_stale_feed = bool(notify_stale and notifier and notifier.cfg.notify_stale_feed)
 
     def _bar_close_ms_from_open_sec(self, open_sec: int) -> int:
         return int((open_sec + self.tf_sec) * 1000)
@@ -60,62 +59,67 @@ class MT5FeedRunner:
                 continue
 
             self.last_stale_warn_ms[sym] = now
-            age_min = age_ms / 60000.0
-            thr_min = self.stale_threshold_ms / 60000.0
-            log.warning(
+            # Built once and shared by the log line and the notification.
+            msg = (
                 f"STALE_FEED symbol={sym} tf={self.timeframe} "
-                f"last_close={ms_to_iso(last_close)} age_min={age_min:.1f} "
-                f"(no new bars for >{thr_min:.0f}m)"
+                f"last_close={ms_to_iso(last_close)} age_min={age_ms / 60000.0:.1f} "
+                f"(no new bars for >{self._thr_min:.0f}m)"
             )
-            if self.notify_stale and self.notifier and self.notifier.cfg.notify_stale_feed:
-                msg = (
-                    f"STALE_FEED symbol={sym} tf={self.timeframe} "
-                    f"last_close={ms_to_iso(last_close)} age_min={age_min:.1f} "
-                    f"(no new bars for >{thr_min:.0f}m)"
-                )
+            log.warning("%s", msg)
+            if self._notify_stale_feed:
                 self.notifier.send(msg, key=f"stale:{sym}")
 
     def poll_symbol(self, symbol: str, tf_bars: int = 600, m1_bars: int = 3000) -> Optional[Signal]:
+        # Most polls find no new bar; a 3-bar probe is enough to tell.
+        prev = self.last_bar_time.get(symbol)
+        probe = self.bridge.copy_rates(symbol, self.tf, 3)
+        if len(probe) < 3:
+            return None
+        if prev is not None and int(probe["time"][-2]) <= prev:
+            return None
+
+        # MT5 rates are structured ndarrays; the engine reads their columns as views.
         rates_tf = self.bridge.copy_rates(symbol, self.tf, tf_bars)
-        df_tf = _rates_to_df(rates_tf)
-        if len(df_tf) < 3:
+        if len(rates_tf) < 3:
             return None
 
         # last row is forming; process last closed = -2
-        last_closed = df_tf.iloc[-2]
-        open_sec = int(last_closed["time"])
-
-        prev = self.last_bar_time.get(symbol)
+        open_sec = int(rates_tf["time"][-2])
         if prev is not None and open_sec <= prev:
             return None
         self.last_bar_time[symbol] = open_sec
-        log.info(
-            f"BAR_CLOSE symbol={symbol} tf={self.timeframe} open_sec={open_sec} "
-            f"close_ms={self._bar_close_ms_from_open_sec(open_sec)}"
-        )
+        close_ms = self._bar_close_ms_from_open_sec(open_sec)
+        log.info("BAR_CLOSE symbol=%s tf=%s open_sec=%d close_ms=%d", symbol, self.timeframe, open_sec, close_ms)
 
-        df_tf_closed = df_tf.iloc[:-1].copy()
+        tf_closed = rates_tf[:-1]
 
         # M1 up to close of last_closed
         rates_m1 = self.bridge.copy_rates(symbol, mt5_tf("M1"), m1_bars)
-        df_1m = _rates_to_df(rates_m1)
         close_sec = open_sec + self.tf_sec
-        df_1m = df_1m[df_1m["time"] < close_sec].copy()
-        if len(df_1m) < 10:
+        m1_closed = rates_m1[: int(np.searchsorted(rates_m1["time"], close_sec))]
+        if len(m1_closed) < 10:
             return None
 
-        close_ms = self._bar_close_ms_from_open_sec(open_sec)
         self.last_bar_close_ms[symbol] = close_ms
-        sig = self.engine.on_tf_bar_close(symbol=symbol, df_tf=df_tf_closed, df_1m=df_1m, bar_close_ms=close_ms)
+        sig = self.engine.on_tf_bar_close(symbol=symbol, tf_bars=tf_closed, m1_bars=m1_closed, bar_close_ms=close_ms)
         if sig:
             log.info(
-                f"SIGNAL {sig.side} {sig.symbol} tf={sig.tf} entry={sig.entry_price:.5f} "
-                f"cvd_ok={sig.cvd_ok} cvd={sig.cvd:.2f} thr={sig.cvd_thr:.2f} confirm_time_ms={sig.confirm_time_ms}"
+                "SIGNAL %s %s tf=%s entry=%.5f cvd_ok=%s cvd=%.2f thr=%.2f confirm_time_ms=%d",
+                sig.side,
+                sig.symbol,
+                sig.tf,
+                sig.entry_price,
+                sig.cvd_ok,
+                sig.cvd,
+                sig.cvd_thr,
+                sig.confirm_time_ms,
             )
         return sig
 
     def run_forever(self, symbols, on_signal, poll_seconds: float = 1.0) -> None:
-        log.info(f"MT5 master mode running. timeframe={self.timeframe} symbols={symbols}")
+        log.info("MT5 master mode running. timeframe=%s symbols=%s", self.timeframe, symbols)
+        # Symbols are polled one after another: the MetaTrader5 package is not
+        # thread-safe, so terminal calls must not overlap.
         while True:
             for sym in symbols:
                 try:
@@ -123,6 +127,6 @@ class MT5FeedRunner:
                     if sig:
                         on_signal(sig)
                 except Exception as e:
-                    log.error(f"poll error symbol={sym}: {e}")
+                    log.error("poll error symbol=%s: %s", sym, e)
             self._stale_check(symbols)
             time.sleep(poll_seconds)
@@ -1,19 +1,84 @@
 from __future__ import annotations
 
+from bisect import bisect_left, insort
 from dataclasses import dataclass
-from typing import Deque, Dict, Optional
+from typing import Deque, Dict, List, Mapping, Optional, Tuple
 
 from collections import deque
 
 import numpy as np
-import pandas as pd
 
 from .config import StrategyConfig
+from .utils.jit import njit
 from .utils.logger import setup_logger
 
 log = setup_logger("strategy")
 
-@dataclass
+# Bars as columns: name -> 1-D array, oldest bar first. Columns used by the
+# engine are open/high/low/close/tick_volume. MT5 rate arrays (structured
+# ndarrays) and pandas DataFrames with those columns are accepted too.
+KlineBatch = Mapping[str, np.ndarray]
+
+# Scalar kernels used to seed the streaming state from a whole batch: each
+# returns only the value at the last element of its input.
+
+@njit(cache=True)
+def _ewm_last(x: np.ndarray, alpha: float) -> float:
+    # Same recurrence as pandas ewm(adjust=False).mean() on NaN-free input.
+    w = x[0]
+    for k in range(1, x.shape[0]):
+        w = (1.0 - alpha) * w + alpha * x[k]
+    return w
+
+@njit(cache=True)
+def _ema_last(x: np.ndarray, length: int) -> float:
+    return _ewm_last(x, 2.0 / (length + 1.0))
+
+@njit(cache=True)
+def _atr_last(high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int) -> float:
+    alpha = 1.0 / length
+    w = abs(high[0] - low[0])
+    for k in range(1, close.shape[0]):
+        pc = close[k - 1]
+        tr = max(abs(high[k] - low[k]), abs(high[k] - pc), abs(low[k] - pc))
+        w = (1.0 - alpha) * w + alpha * tr
+    return w
+
+@njit(cache=True, fastmath=True)
+def _cvd_signed_sum(close: np.ndarray, open_: np.ndarray, vol: np.ndarray, n: int) -> float:
+    # Volume of the last n bars, signed by candle direction, in one pass.
+    s = 0.0
+    for k in range(close.shape[0] - n, close.shape[0]):
+        s += vol[k] if close[k] >= open_[k] else -vol[k]
+    return s
+
+@njit(cache=True)
+def _pivotlow_confirmed(low: np.ndarray, i: int, left: int, right: int) -> int:
+    """Index of the pivot low confirmed at bar i, or -1.
+
+    The pivot must be the strict minimum of its window: one pass, bailing out
+    on the first lower bar or the second bar equal to it.
+    """
+    if i < left + right:
+        return -1
+    piv = i - right
+    w0 = piv - left
+    w1 = piv + right
+    if w0 < 0 or w1 >= low.shape[0]:
+        return -1
+    pv = low[piv]
+    cnt = 0
+    for k in range(w0, w1 + 1):
+        x = low[k]
+        if x < pv:
+            return -1
+        if x == pv:
+            cnt += 1
+            if cnt > 1:
+                return -1
+    return piv if cnt == 1 else -1
+
+@dataclass(slots=True)
 class Signal:
     symbol: str
     side: str               # "LONG"
@@ -21,25 +86,42 @@ class Signal:
     confirm_time_ms: int
     pivot_price: float
     trigger: float
+    atr_at_close: float     # ATR(14) on the signal bar
     cvd_ok: bool
     cvd: float
     cvd_thr: float
     tf: str
 
-@dataclass
+@dataclass(slots=True)
 class SymbolState:
-    lastPL_price: Optional[float] = None
-    lastPL_osc: Optional[float] = None
-    lastPL_bar: Optional[int] = None
+    # Unset values are NaN (prices) or -1 (bar indices), never None.
+    lastPL_price: float = float("nan")
+    lastPL_osc: float = float("nan")
+    lastPL_bar: int = -1
 
-    lastEntryBar: Optional[int] = None
+    lastEntryBar: int = -1
 
     longSetup: bool = False
-    longTrig: Optional[float] = None
-    longPL: Optional[float] = None
-    longSetBar: Optional[int] = None
+    longTrig: float = float("nan")
+    longPL: float = float("nan")
+    longSetBar: int = -1
 
     cvd_hist: Deque[float] = None
+    cvd_sorted: List[float] = None  # cvd_hist kept in ascending order
+
+    # Streaming indicator state, folded one TF bar at a time. All bar indices in
+    # this state count bars seen for the symbol; they are not batch offsets.
+    bar: int = -1
+    first_bar: int = 0
+    last_bar_time: object = None
+    prev_close: float = float("nan")
+    atr: float = float("nan")
+    osc_ema: float = float("nan")
+    osc_hist: Deque[float] = None   # osc EMA, last pivotLen + 1 bars
+    loc_hist: Deque[float] = None   # Donchian location, last pivotLen + 1 bars
+    don_hi: Deque[Tuple[int, float]] = None  # monotonic (bar, high), donLen window
+    don_lo: Deque[Tuple[int, float]] = None  # monotonic (bar, low), donLen window
+    hh_pivot: Deque[Tuple[int, float]] = None  # monotonic (bar, high), pivotLen window
 
 class PineParityEngine:
     """Python port of your Pine logic (LONG ONLY), excluding fail-fast."""
@@ -49,174 +131,273 @@ class PineParityEngine:
         self.cfg = cfg
         self.state: Dict[str, SymbolState] = {}
 
+        # Config is fixed after load; cast it once instead of on every bar.
+        self._entry_mode = str(cfg.entryMode).strip().lower()
+        self._don_len = int(cfg.donLen)
+        self._pivot_len = int(cfg.pivotLen)
+        self._osc_len = int(cfg.oscLen)
+        self._min_need = max(self._don_len, 2 * self._pivot_len + 2, 50)
+        self._cooldown = int(cfg.cooldownBars)
+        self._ext_band = float(cfg.extBandPct)
+        self._min_div = float(cfg.minDivStrength)
+        self._bos_buf = float(cfg.bosAtrBuffer)
+        self._max_wait = int(cfg.maxWaitBars)
+        self._long_only = bool(cfg.longOnly)
+        self._use_bos = bool(cfg.useBOSConfirm)
+        self._trade_all = bool(cfg.tradeAllDivergences)
+        self._use_cvd = bool(cfg.useCvdGate)
+        self._use_dyn = bool(cfg.useDynamicCvdPct)
+        self._cvd_len = int(cfg.cvdLenMin)
+        self._cvd_lookback = int(cfg.cvdLookbackBars)
+        self._cvd_pct = float(cfg.cvdPct)
+        self._cvd_thr_static = float(cfg.cvdThreshold)
+        self._alpha_osc = 2.0 / (self._osc_len + 1.0)
+        self._alpha_atr = 1.0 / 14
+
     def _st(self, symbol: str) -> SymbolState:
-        if symbol not in self.state:
-            self.state[symbol] = SymbolState(cvd_hist=deque(maxlen=int(self.cfg.cvdLookbackBars)))
-        return self.state[symbol]
+        st = self.state.get(symbol)
+        if st is None:
+            hist_len = self._pivot_len + 1
+            st = self.state[symbol] = SymbolState(
+                cvd_hist=deque(maxlen=self._cvd_lookback),
+                cvd_sorted=[],
+                osc_hist=deque(maxlen=hist_len),
+                loc_hist=deque(maxlen=hist_len),
+                don_hi=deque(),
+                don_lo=deque(),
+                hh_pivot=deque(),
+            )
+        return st
 
     @staticmethod
-    def _ema(series: pd.Series, length: int) -> pd.Series:
-        return series.ewm(span=length, adjust=False).mean()
+    def _bar_times(bars: KlineBatch) -> Optional[np.ndarray]:
+        # MT5 rates carry "time", Binance batches "open_time"; either identifies a bar.
+        for name in ("time", "open_time"):
+            try:
+                return np.asarray(bars[name])
+            except (KeyError, ValueError):
+                continue
+        return None
 
     @staticmethod
-    def _rma(series: pd.Series, length: int) -> pd.Series:
-        alpha = 1.0 / float(length)
-        return series.ewm(alpha=alpha, adjust=False).mean()
+    def _push_max(dq: Deque[Tuple[int, float]], j: int, x: float, n: int) -> float:
+        while dq and dq[-1][1] <= x:
+            dq.pop()
+        dq.append((j, x))
+        if dq[0][0] <= j - n:
+            dq.popleft()
+        return dq[0][1]
 
     @staticmethod
-    def _atr(df: pd.DataFrame, length: int = 14) -> pd.Series:
-        high = df["high"]
-        low = df["low"]
-        close = df["close"]
-        prev_close = close.shift(1)
-        tr = pd.concat(
-            [(high - low).abs(), (high - prev_close).abs(), (low - prev_close).abs()],
-            axis=1,
-        ).max(axis=1)
-        return PineParityEngine._rma(tr, length)
+    def _push_min(dq: Deque[Tuple[int, float]], j: int, x: float, n: int) -> float:
+        while dq and dq[-1][1] >= x:
+            dq.pop()
+        dq.append((j, x))
+        if dq[0][0] <= j - n:
+            dq.popleft()
+        return dq[0][1]
+
+    def _fold(self, st: SymbolState, o: float, h: float, l: float, c: float, v: float) -> None:
+        st.bar += 1
+        j = st.bar
+        x = (c - o) * v
+        pc = st.prev_close
+        if pc != pc:
+            st.atr = abs(h - l)
+            st.osc_ema = x
+        else:
+            tr = max(abs(h - l), abs(h - pc), abs(l - pc))
+            st.atr = (1.0 - self._alpha_atr) * st.atr + self._alpha_atr * tr
+            st.osc_ema = (1.0 - self._alpha_osc) * st.osc_ema + self._alpha_osc * x
+        st.prev_close = c
+
+        donHi = self._push_max(st.don_hi, j, h, self._don_len)
+        donLo = self._push_min(st.don_lo, j, l, self._don_len)
+        self._push_max(st.hh_pivot, j, h, self._pivot_len)
+        rng = donHi - donLo
+        if j - st.first_bar >= self._don_len - 1 and rng > 0:
+            st.loc_hist.append((c - donLo) / rng)
+        else:
+            st.loc_hist.append(0.5)
+        st.osc_hist.append(st.osc_ema)
+
+    def _warmup(self, st: SymbolState, o: np.ndarray, h: np.ndarray, l: np.ndarray, c: np.ndarray, v: np.ndarray) -> None:
+        # Rebuild the streaming state from a whole batch. The ewm scalars are
+        # seeded by the kernels; only the tail the windows need is folded.
+        n = len(c)
+        st.first_bar = st.bar + 1
+        for dq in (st.osc_hist, st.loc_hist, st.don_hi, st.don_lo, st.hh_pivot):
+            dq.clear()
+        start = max(0, n - self._don_len - self._pivot_len)
+        if start:
+            st.atr = _atr_last(h[:start], l[:start], c[:start], 14)
+            st.osc_ema = _ema_last((c[:start] - o[:start]) * v[:start], self._osc_len)
+            st.prev_close = float(c[start - 1])
+            st.bar += start
+        else:
+            st.prev_close = float("nan")
+        for k in range(start, n):
+            self._fold(st, float(o[k]), float(h[k]), float(l[k]), float(c[k]), float(v[k]))
 
     @staticmethod
-    def _pivotlow_confirmed(low: np.ndarray, i: int, left: int, right: int) -> Optional[int]:
-        if i < left + right:
-            return None
-        piv = i - right
-        w0 = piv - left
-        w1 = piv + right
-        if w0 < 0:
-            return None
-        window = low[w0 : w1 + 1]
-        if window.size != (left + right + 1):
-            return None
-        mn = window.min()
-        if low[piv] != mn:
-            return None
-        if (window == mn).sum() != 1:
-            return None
-        return piv
+    def _col(bars: KlineBatch, name: str) -> np.ndarray:
+        # OHLC columns are float64 in both feeds, so this is normally a view.
+        return np.asarray(bars[name], dtype=np.float64)
 
     @staticmethod
-    def _percentile_linear(vals: np.ndarray, pct: float) -> float:
-        if vals.size == 0:
+    def _raw(bars: KlineBatch, name: str) -> np.ndarray:
+        # As stored (MT5 tick_volume is uint64); callers cast only what they use.
+        return np.asarray(bars[name])
+
+    @staticmethod
+    def _atr(bars: KlineBatch, length: int = 14) -> float:
+        """ATR(length) on the last bar of bars."""
+        return float(
+            _atr_last(
+                PineParityEngine._col(bars, "high"),
+                PineParityEngine._col(bars, "low"),
+                PineParityEngine._col(bars, "close"),
+                length,
+            )
+        )
+
+    @staticmethod
+    def _push_cvd(st: SymbolState, x: float) -> None:
+        hist = st.cvd_hist
+        if hist.maxlen == 0:
+            return
+        if len(hist) == hist.maxlen:
+            del st.cvd_sorted[bisect_left(st.cvd_sorted, hist[0])]
+        hist.append(x)
+        insort(st.cvd_sorted, x)
+
+    @staticmethod
+    def _percentile_linear(vals: List[float], pct: float) -> float:
+        # np.percentile(method="linear") on an already sorted list, same lerp.
+        n = len(vals)
+        if n == 0:
             return float("nan")
-        try:
-            return float(np.percentile(vals, pct, method="linear"))
-        except TypeError:
-            return float(np.percentile(vals, pct, interpolation="linear"))
-
-    def compute_cvd_proxy_1m(self, df_1m: pd.DataFrame) -> float:
-        L = int(self.cfg.cvdLenMin)
-        if len(df_1m) < L:
-            L = len(df_1m)
+        pos = (n - 1) * (pct / 100.0)
+        lo = int(pos)
+        if lo >= n - 1:
+            return vals[-1]
+        t = pos - lo
+        a = vals[lo]
+        d = vals[lo + 1] - a
+        return vals[lo + 1] - d * (1.0 - t) if t >= 0.5 else a + d * t
+
+    def compute_cvd_proxy_1m(self, m1_bars: KlineBatch) -> float:
+        close = self._col(m1_bars, "close")
+        L = self._cvd_len
+        if len(close) < L:
+            L = len(close)
         if L <= 0:
             return 0.0
-        tail = df_1m.iloc[-L:]
-        sv = np.where(
-            tail["close"].to_numpy() >= tail["open"].to_numpy(),
-            tail["tick_volume"].to_numpy(),
-            -tail["tick_volume"].to_numpy(),
-        )
-        return float(np.sum(sv))
+        vol = self._raw(m1_bars, "tick_volume")[-L:].astype(np.float64, copy=False)
+        return float(_cvd_signed_sum(close[-L:], self._col(m1_bars, "open")[-L:], vol, L))
 
-    def on_tf_bar_close(self, symbol: str, df_tf: pd.DataFrame, df_1m: pd.DataFrame, bar_close_ms: int) -> Optional[Signal]:
+    def on_tf_bar_close(
+        self, symbol: str, tf_bars: KlineBatch, m1_bars: KlineBatch, bar_close_ms: int
+    ) -> Optional[Signal]:
         st = self._st(symbol)
-        cfg = self.cfg
-        entry_mode = str(cfg.entryMode).strip().lower()
 
-        min_need = max(cfg.donLen, 2 * cfg.pivotLen + 2, 50)
-        if len(df_tf) < min_need:
+        c = self._col(tf_bars, "close")
+        if len(c) < self._min_need:
             return None
 
-        o = df_tf["open"].astype(float)
-        h = df_tf["high"].astype(float)
-        l = df_tf["low"].astype(float)
-        c = df_tf["close"].astype(float)
-        v = df_tf["tick_volume"].astype(float)
-
-        donHi = h.rolling(cfg.donLen).max()
-        donLo = l.rolling(cfg.donLen).min()
-        rng = donHi - donLo
-        loc = np.where(rng.to_numpy() > 0, (c - donLo) / rng, 0.5)
-
-        osc_src = (c - o) * v
-        osc = self._ema(osc_src, cfg.oscLen)
-        atr = self._atr(df_tf, 14)
-        hh_pivot = h.rolling(cfg.pivotLen).max()
-
-        cvdProxy = self.compute_cvd_proxy_1m(df_1m)
-        if cfg.useDynamicCvdPct:
-            st.cvd_hist.append(cvdProxy)
-            hist = np.array(st.cvd_hist, dtype=float)
-            cvdThrUsed = self._percentile_linear(hist, float(cfg.cvdPct))
+        o = self._col(tf_bars, "open")
+        h = self._col(tf_bars, "high")
+        l = self._col(tf_bars, "low")
+        v = self._raw(tf_bars, "tick_volume")  # only new bars are cast, in _fold
+
+        n = len(c)
+        times = self._bar_times(tf_bars)
+        k0 = -1
+        if times is not None and st.last_bar_time is not None:
+            k = int(np.searchsorted(times, st.last_bar_time))
+            if k < n and times[k] == st.last_bar_time:
+                k0 = k
+        if k0 == n - 1:
+            return None  # bar already folded
+        if k0 >= 0:
+            for k in range(k0 + 1, n):
+                self._fold(st, float(o[k]), float(h[k]), float(l[k]), float(c[k]), float(v[k]))
+        else:
+            self._warmup(st, o, h, l, c, v)
+        st.last_bar_time = times[-1] if times is not None else None
+        atr_i = st.atr
+
+        cvdProxy = self.compute_cvd_proxy_1m(m1_bars)
+        if self._use_dyn:
+            self._push_cvd(st, cvdProxy)
+            cvdThrUsed = self._percentile_linear(st.cvd_sorted, self._cvd_pct)
         else:
-            cvdThrUsed = float(cfg.cvdThreshold)
+            cvdThrUsed = self._cvd_thr_static
 
-        cvdGateLong = (not cfg.useCvdGate) or (cvdProxy >= cvdThrUsed)
+        cvdGateLong = (not self._use_cvd) or (cvdProxy >= cvdThrUsed)
 
-        i = len(df_tf) - 1
-        low_arr = l.to_numpy(dtype=float)
+        i = st.bar
 
         def canEnter() -> bool:
-            if int(cfg.cooldownBars) <= 0:
+            if self._cooldown <= 0:
                 return True
-            if st.lastEntryBar is None:
+            if st.lastEntryBar < 0:
                 return True
-            return (i - int(st.lastEntryBar)) >= int(cfg.cooldownBars)
+            return (i - st.lastEntryBar) >= self._cooldown
 
         longSignal = False
 
-        piv = self._pivotlow_confirmed(low_arr, i, cfg.pivotLen, cfg.pivotLen)
-        if piv is not None:
-            pl_price = float(low_arr[piv])
-            pl_osc = float(osc.iloc[piv])
-            loc_p = float(loc[piv])
+        piv = _pivotlow_confirmed(l, n - 1, self._pivot_len, self._pivot_len)
+        if piv >= 0:
+            pl_price = float(l[piv])
+            pl_osc = st.osc_hist[0]
+            loc_p = st.loc_hist[0]
 
-            nearLower = loc_p <= float(cfg.extBandPct)
-            hasPrev = st.lastPL_price is not None
+            nearLower = loc_p <= self._ext_band
+            hasPrev = st.lastPL_bar >= 0
 
-            bullDiv = hasPrev and (pl_price <= float(st.lastPL_price)) and (pl_osc > float(st.lastPL_osc))
-            safePrevOsc = max(abs(float(st.lastPL_osc)) if hasPrev else 0.0, 1e-9)
-            oscChange = ((pl_osc - float(st.lastPL_osc)) / safePrevOsc) * 100.0 if hasPrev else 0.0
-            strengthOk = (float(cfg.minDivStrength) <= 0.0) or (oscChange >= float(cfg.minDivStrength))
+            bullDiv = hasPrev and (pl_price <= st.lastPL_price) and (pl_osc > st.lastPL_osc)
+            safePrevOsc = max(abs(st.lastPL_osc) if hasPrev else 0.0, 1e-9)
+            oscChange = ((pl_osc - st.lastPL_osc) / safePrevOsc) * 100.0 if hasPrev else 0.0
+            strengthOk = (self._min_div <= 0.0) or (oscChange >= self._min_div)
 
-            if bool(cfg.longOnly) and nearLower and bullDiv and strengthOk:
+            if self._long_only and nearLower and bullDiv and strengthOk:
                 if canEnter():
                     st.longSetup = True
-                    st.longTrig = float(hh_pivot.iloc[i])
+                    st.longTrig = st.hh_pivot[0][1]
                     st.longPL = pl_price
                     st.longSetBar = i
 
-                    if entry_mode == "raw" and bool(cfg.tradeAllDivergences) and cvdGateLong:
+                    if self._entry_mode == "raw" and self._trade_all and cvdGateLong:
                         longSignal = True
                         st.longSetup = False
 
             st.lastPL_price = pl_price
             st.lastPL_osc = pl_osc
-            st.lastPL_bar = piv
+            st.lastPL_bar = i - self._pivot_len
 
-        if entry_mode == "confirm" and st.longSetup and st.longSetBar is not None:
-            if (i - int(st.longSetBar)) > int(cfg.maxWaitBars):
+        if self._entry_mode == "confirm" and st.longSetup:
+            if (i - st.longSetBar) > self._max_wait:
                 st.longSetup = False
             else:
-                buf = float(atr.iloc[i]) * float(cfg.bosAtrBuffer)
-                trig = float(st.longTrig) if st.longTrig is not None else float("nan")
-                bosOk = float(c.iloc[i]) > (trig + buf)
-                trigOk = bosOk if bool(cfg.useBOSConfirm) else (float(c.iloc[i]) > float(o.iloc[i]))
+                buf = atr_i * self._bos_buf
+                bosOk = float(c[-1]) > (st.longTrig + buf)
+                trigOk = bosOk if self._use_bos else (float(c[-1]) > float(o[-1]))
 
-                if trigOk and cvdGateLong and canEnter() and bool(cfg.tradeAllDivergences):
+                if trigOk and cvdGateLong and canEnter() and self._trade_all:
                     longSignal = True
                     st.longSetup = False
 
         if longSignal:
             st.lastEntryBar = i
-            pivot_price = float(st.longPL) if st.longPL is not None else float("nan")
-            trigger = float(st.longTrig) if st.longTrig is not None else float("nan")
             return Signal(
                 symbol=symbol,
                 side="LONG",
-                entry_price=float(c.iloc[i]),
+                entry_price=float(c[-1]),
                 confirm_time_ms=int(bar_close_ms - 1),
-                pivot_price=pivot_price,
-                trigger=trigger,
+                pivot_price=st.longPL,
+                trigger=st.longTrig,
+                atr_at_close=atr_i,
                 cvd_ok=bool(cvdGateLong),
                 cvd=float(cvdProxy),
                 cvd_thr=float(cvdThrUsed),
@@ -1,20 +1,32 @@
 from __future__ import annotations
 
 import asyncio
+import concurrent.futures
 import os
 import ssl
+import threading
 import time
 from dataclasses import dataclass
-from typing import Dict, Optional
+from typing import Dict, Optional, Set
 
 import aiohttp
 
+try:
+    from orjson import dumps as _dumps
+except ImportError:  # optional speedup; stdlib json encodes the same payloads
+    import json
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+
 from .utils.logger import setup_logger
 
 log = setup_logger("telegram")
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
 
-@dataclass
+@dataclass(slots=True)
 class TelegramConfig:
     enabled: bool = False
     token: str = ""
@@ -33,13 +45,23 @@ class TelegramNotifier:
     def __init__(self, cfg: TelegramConfig):
         self.cfg = cfg
         self._last_sent: Dict[str, float] = {}
+        self._throttle_secs = float(cfg.throttle_seconds) if cfg.throttle_seconds and cfg.throttle_seconds > 0 else 0.0
+        self._url = f"https://api.telegram.org/bot{cfg.token}/sendMessage"
+        self._ssl = self._ssl_context()
+
+        # One event loop thread and one ClientSession serve every send, so the
+        # connection (and its TLS session) is kept alive between messages.
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._pending: Set[concurrent.futures.Future] = set()
 
     def _throttled(self, key: str) -> bool:
-        if not self.cfg.throttle_seconds or self.cfg.throttle_seconds <= 0:
+        if self._throttle_secs == 0.0:
             return False
-        now = time.time()
-        last = self._last_sent.get(key, 0.0)
-        if now - last < float(self.cfg.throttle_seconds):
+        now = time.monotonic()
+        last = self._last_sent.get(key)
+        if last is not None and now - last < self._throttle_secs:
             return True
         self._last_sent[key] = now
         return False
@@ -50,6 +72,23 @@ class TelegramNotifier:
             return ssl.create_default_context(cafile=cafile)
         return None
 
+    def _bg_loop(self) -> asyncio.AbstractEventLoop:
+        with self._loop_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="telegram", daemon=True).start()
+                self._loop = loop
+            return self._loop
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # Only called on the background loop, which owns the session.
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(ssl=self._ssl if self._ssl is not None else True, limit=4),
+                timeout=aiohttp.ClientTimeout(total=10),
+            )
+        return self._session
+
     async def _send_async(self, text: str) -> None:
         if not self.cfg.enabled:
             return
@@ -62,7 +101,6 @@ class TelegramNotifier:
             log.warning("telegram message is empty")
             return
 
-        url = f"https://api.telegram.org/bot{self.cfg.token}/sendMessage"
         payload = {
             "chat_id": self.cfg.chat_id,
             "text": msg,
@@ -70,14 +108,13 @@ class TelegramNotifier:
         }
 
         try:
-            ssl_ctx = self._ssl_context()
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, ssl=ssl_ctx, timeout=10) as resp:
-                    if resp.status >= 300:
-                        body = await resp.text()
-                        log.error(f"send failed status={resp.status} body={body[:200]}")
+            async with self._get_session().post(self._url, data=_dumps(payload), headers=_JSON_HEADERS) as resp:
+                # Read the body even on success so the connection goes back to the pool.
+                body = await resp.text()
+                if resp.status >= 300:
+                    log.error("send failed status=%s body=%s", resp.status, body[:200])
         except Exception as e:
-            log.error(f"send failed: {e}")
+            log.error("send failed: %s", e)
 
     def send(self, text: str, *, key: Optional[str] = None) -> None:
         if not self.cfg.enabled:
@@ -89,13 +126,30 @@ class TelegramNotifier:
         if self._throttled(k):
             return
 
+        # Fire and forget: the poll loop never waits on Telegram.
+        try:
+            fut = asyncio.run_coroutine_threadsafe(self._send_async(text), self._bg_loop())
+        except Exception as e:
+            log.error("send failed: %s", e)
+            return
+        self._pending.add(fut)
+        fut.add_done_callback(self._pending.discard)
+
+    def close(self) -> None:
+        with self._loop_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        # Let queued messages (e.g. a final failure notice) go out first.
+        concurrent.futures.wait(list(self._pending), timeout=10)
+
+        async def _shutdown() -> None:
+            if self._session is not None:
+                await self._session.close()
+                self._session = None
+
         try:
-            asyncio.run(self._send_async(text))
-        except RuntimeError:
-            try:
-                loop = asyncio.get_running_loop()
-                loop.create_task(self._send_async(text))
-            except Exception as e:
-                log.error(f"send failed (loop): {e}")
+            asyncio.run_coroutine_threadsafe(_shutdown(), loop).result(timeout=5)
         except Exception as e:
-            log.error(f"send failed: {e}")
+            log.error("close failed: %s", e)
+        loop.call_soon_threadsafe(loop.stop)
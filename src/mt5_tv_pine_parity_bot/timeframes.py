@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import functools
+
 import MetaTrader5 as mt5
 
 _UNIT_MAP = {
@@ -57,6 +59,8 @@ TF_SECONDS = {
     "MN1": 2592000,  # approximate
 }
 
+# Inputs are a handful of config strings and the results are immutable.
+@functools.lru_cache(maxsize=64)
 def _normalize_mt5_key(tf: str) -> str:
     s = tf.strip().upper()
     if s in TF_MAP:
@@ -66,32 +70,36 @@ def _normalize_mt5_key(tf: str) -> str:
         return f"{unit}{int(s[:-1])}"
     raise ValueError(f"Unsupported timeframe: {tf}")
 
+@functools.lru_cache(maxsize=64)
 def mt5_tf(tf: str) -> int:
     key = _normalize_mt5_key(tf)
     if key not in TF_MAP:
         raise ValueError(f"Unsupported timeframe: {tf}")
     return TF_MAP[key]
 
+@functools.lru_cache(maxsize=64)
 def tf_seconds(tf: str) -> int:
     key = _normalize_mt5_key(tf)
     if key not in TF_SECONDS:
         raise ValueError(f"Unsupported timeframe: {tf}")
     return TF_SECONDS[key]
 
+# MT5-style keys and their lowercase aliases -> Binance interval, e.g. "H4"/"h4" -> "4h".
+# MN1 has no fixed-length Binance equivalent here and stays unsupported.
+_BINANCE_MAP = {}
+for _k in TF_MAP:
+    if _k != "MN1":
+        _BINANCE_MAP[_k] = _BINANCE_MAP[_k.lower()] = f"{int(_k[1:])}{_k[0].lower()}"
+del _k
+
+@functools.lru_cache(maxsize=64)
 def to_binance_interval(tf: str) -> str:
     s = tf.strip()
     if not s:
         raise ValueError("timeframe is required")
-    s_upper = s.upper()
-    if s_upper in TF_MAP:
-        if s_upper.startswith("M"):
-            return f"{int(s_upper[1:])}m"
-        if s_upper.startswith("H"):
-            return f"{int(s_upper[1:])}h"
-        if s_upper.startswith("D"):
-            return f"{int(s_upper[1:])}d"
-        if s_upper.startswith("W"):
-            return f"{int(s_upper[1:])}w"
+    hit = _BINANCE_MAP.get(s)
+    if hit is not None:
+        return hit
     if s[-1].lower() in ("m", "h", "d", "w") and s[:-1].isdigit():
         return f"{int(s[:-1])}{s[-1].lower()}"
     raise ValueError(f"Unsupported binance timeframe: {tf}")
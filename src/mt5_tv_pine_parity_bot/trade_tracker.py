@@ -1,20 +1,62 @@
 from __future__ import annotations
 
+import asyncio
 import threading
 import time
-from dataclasses import dataclass
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Set
 
 import MetaTrader5 as mt5
+import numpy as np
 
 from .telegram_notify import TelegramNotifier
+from .utils.jit import njit
 from .utils.logger import setup_logger
 
 log = setup_logger("trade_tracker")
 
-
-@dataclass
+# Relative distance from TP/SL within which an exit is attributed to it.
+EXIT_MATCH_TOL = 0.0005
+
+# Closing-deal count from which aggregation goes through the compiled kernel.
+NJIT_MIN_DEALS = 64
+
+_EXIT_FMT = (
+    "EXIT ({reason})\n"
+    "Mode: {mode} | Source: {source}\n"
+    "{symbol} {side} tf={tf}\n"
+    "Entry: {entry:.5f}\n"
+    "Exit:  {exit:.5f}\n"
+    "PnL:   {pnl:.2f}\n"
+    "R:     {r:.2f}R\n"
+    "Dur:   {dur_min}m\n"
+)
+
+
+@njit(cache=True)
+def _sum_deal_cols(
+    profit: np.ndarray, commission: np.ndarray, swap: np.ndarray, price: np.ndarray, volume: np.ndarray
+):
+    # (profit, price*volume over priced deals, their volume, total volume) in one pass.
+    pnl = 0.0
+    px_num = 0.0
+    px_den = 0.0
+    vol = 0.0
+    for k in range(profit.shape[0]):
+        pnl += profit[k] + commission[k] + swap[k]
+        px = price[k]
+        v = volume[k]
+        vol += v
+        if v > 0 and px > 0:
+            px_num += px * v
+            px_den += v
+    return pnl, px_num, px_den, vol
+
+
+@dataclass(slots=True)
 class TradeMeta:
     mode: str  # "tv_master" or "binance_master"
     source: str  # "TV" or "MT5"
@@ -40,6 +82,19 @@ class TradeMeta:
     max_price: Optional[float] = None
     min_price: Optional[float] = None
 
+    # Closing deals gathered so far; last_deal_ms is the history cursor (time_msc
+    # of the newest deal counted for this trade), deal_tickets the deals counted.
+    last_deal_ms: int = 0
+    deal_tickets: Set[int] = field(default_factory=set)
+    partial_profit: float = 0.0
+    partial_px_num: float = 0.0
+    partial_px_den: float = 0.0
+    partial_volume: float = 0.0
+
+    # How close the exit price must be to TP/SL to be reported as such (set at register_open).
+    tp_tol: Optional[float] = None
+    sl_tol: Optional[float] = None
+
 
 class TradeTracker:
     def __init__(
@@ -57,19 +112,35 @@ class TradeTracker:
         self.history_days = int(history_days)
         self.magic = int(magic)
 
+        # Copy-on-write: writers publish a fresh dict under _lock, readers take
+        # a lock-free snapshot of the attribute.
         self._lock = threading.Lock()
         self._open: Dict[str, TradeMeta] = {}  # key: symbol
         self._stop = False
         self._t: Optional[threading.Thread] = None
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[Executor] = None
 
-    def start(self) -> None:
+    def start(
+        self,
+        loop: Optional[asyncio.AbstractEventLoop] = None,
+        executor: Optional[Executor] = None,
+    ) -> None:
+        # With a loop the tracker is scheduled as a task on it; otherwise it gets
+        # its own thread. Either way each poll runs on ``executor`` when given,
+        # so a single-worker executor shared with the order path keeps MT5 calls
+        # from overlapping and off the event loop.
         if not self.enabled:
             return
-        if self._t and self._t.is_alive():
+        if (self._t and self._t.is_alive()) or (self._task and not self._task.done()):
             return
         self._stop = False
-        self._t = threading.Thread(target=self._loop, name="TradeTracker", daemon=True)
-        self._t.start()
+        self._executor = executor
+        if loop is not None:
+            self._task = loop.create_task(self._aloop())
+        else:
+            self._t = threading.Thread(target=self._loop, name="TradeTracker", daemon=True)
+            self._t.start()
         log.info("started")
 
     def stop(self) -> None:
@@ -81,116 +152,146 @@ class TradeTracker:
         meta.opened_ts = time.time()
         meta.max_price = meta.entry_price
         meta.min_price = meta.entry_price
+        meta.tp_tol = abs(meta.tp) * EXIT_MATCH_TOL if meta.tp else None
+        meta.sl_tol = abs(meta.sl) * EXIT_MATCH_TOL if meta.sl else None
         with self._lock:
-            self._open[meta.symbol] = meta
+            self._open = {**self._open, meta.symbol: meta}
 
     def _loop(self) -> None:
         while not self._stop:
             try:
-                self._poll()
+                if self._executor is not None:
+                    self._executor.submit(self._poll).result()
+                else:
+                    self._poll()
             except Exception as e:
-                log.error(f"poll error: {e}")
+                log.error("poll error: %s", e)
             time.sleep(self.poll_seconds)
 
-    def _poll(self) -> None:
-        with self._lock:
-            symbols = list(self._open.keys())
+    async def _aloop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._stop:
+            try:
+                await loop.run_in_executor(self._executor, self._poll)
+            except Exception as e:
+                log.error("poll error: %s", e)
+            await asyncio.sleep(self.poll_seconds)
 
-        if not symbols:
+    def _poll(self) -> None:
+        snapshot = self._open
+        if not snapshot:
             return
-
-        positions = mt5.positions_get()
-        pos_by_symbol = {}
-        if positions:
-            for p in positions:
-                try:
-                    if int(getattr(p, "magic", 0)) != self.magic:
-                        continue
-                    pos_by_symbol[str(p.symbol)] = p
-                except Exception:
-                    continue
-
-        for sym in symbols:
-            with self._lock:
-                meta = self._open.get(sym)
-            if not meta:
-                continue
-
-            p = pos_by_symbol.get(sym)
+        symbols = list(snapshot)
+
+        # Let the terminal filter to the tracked symbols; magic is checked here.
+        positions = mt5.positions_get(group=",".join(symbols))
+        magic = self.magic
+        pos_by_symbol: Dict[str, Any] = dict.fromkeys(symbols)
+        for p in positions or ():
+            if p.magic == magic:
+                pos_by_symbol[p.symbol] = p
+        # One clock read per poll, shared by every exit handled below.
+        now_dt = datetime.now()
+        now_s = time.time()
+
+        for sym, meta in snapshot.items():
+            p = pos_by_symbol[sym]
 
             if p is not None:
-                try:
-                    price_cur = float(getattr(p, "price_current", meta.entry_price))
-                    meta.max_price = max(meta.max_price or price_cur, price_cur)
-                    meta.min_price = min(meta.min_price or price_cur, price_cur)
-                    if not meta.position_ticket:
-                        meta.position_ticket = int(getattr(p, "ticket", 0)) or None
-                except Exception:
-                    pass
+                # TradePosition fields are always present; errors surface in the poll loop.
+                price_cur = p.price_current
+                meta.max_price = max(meta.max_price or price_cur, price_cur)
+                meta.min_price = min(meta.min_price or price_cur, price_cur)
+                if not meta.position_ticket:
+                    meta.position_ticket = p.ticket or None
                 continue
 
-            profit_ccy, exit_px, reason = self._calc_exit_from_history(meta)
+            profit_ccy, exit_px, reason = self._calc_exit_from_history(meta, now_dt)
             if profit_ccy is None:
                 continue
 
             risk = float(meta.risk_ccy or 0.0)
             r_mult = (profit_ccy / abs(risk)) if risk else 0.0
-            dur_sec = int(time.time() - meta.opened_ts)
+            dur_sec = int(now_s - meta.opened_ts)
 
             self._notify_exit(meta, profit_ccy, r_mult, exit_px, reason, dur_sec)
 
             with self._lock:
-                self._open.pop(sym, None)
-
-    def _calc_exit_from_history(self, meta: TradeMeta):
-        frm = datetime.now() - timedelta(days=self.history_days)
-        to = datetime.now()
-        deals = mt5.history_deals_get(frm, to)
-        if not deals:
+                # Leave a trade registered for the same symbol since the snapshot.
+                if self._open.get(sym) is meta:
+                    self._open = {k: v for k, v in self._open.items() if k != sym}
+
+    def _calc_exit_from_history(self, meta: TradeMeta, now_dt: datetime):
+        cursor = meta.last_deal_ms
+        seen = meta.deal_tickets
+        if meta.position_ticket:
+            # The terminal filters by position, so no date window or per-deal
+            # symbol/magic checks are needed; the position's few deals are re-read
+            # each time and the ones already counted are dropped by ticket.
+            deals = mt5.history_deals_get(position=int(meta.position_ticket)) or ()
+            new = [d for d in deals if d.entry == mt5.DEAL_ENTRY_OUT and d.ticket not in seen]
+        else:
+            # No ticket yet (the position closed before a poll saw it open).
+            # Scan the full window until a closing deal is found, then only from
+            # the newest one counted (inclusive; repeats are dropped by ticket).
+            if cursor:
+                frm = datetime.fromtimestamp(cursor / 1000.0)
+            else:
+                frm = now_dt - timedelta(days=self.history_days)
+            deals = mt5.history_deals_get(frm, now_dt) or ()
+            magic = self.magic
+            new = [
+                d for d in deals
+                if d.time_msc >= cursor
+                and d.symbol == meta.symbol
+                and d.magic == magic
+                and d.entry == mt5.DEAL_ENTRY_OUT
+                and d.ticket not in seen
+            ]
+
+        if new:
+            seen.update(d.ticket for d in new)
+            meta.last_deal_ms = max(cursor, max(d.time_msc for d in new))
+            profit, px_num, px_den, vol = self._sum_deals(new)
+            meta.partial_profit += profit
+            meta.partial_px_num += px_num
+            meta.partial_px_den += px_den
+            meta.partial_volume += vol
+
+        if not meta.partial_volume:
             return (None, None, None)
-
-        out: List[Any] = []
-        for d in deals:
-            try:
-                if str(getattr(d, "symbol", "")) != meta.symbol:
-                    continue
-                if int(getattr(d, "magic", 0)) != self.magic:
-                    continue
-                if meta.position_ticket:
-                    if int(getattr(d, "position_id", 0)) != int(meta.position_ticket):
-                        continue
-                if int(getattr(d, "entry", -1)) != mt5.DEAL_ENTRY_OUT:
-                    continue
-                out.append(d)
-            except Exception:
-                continue
-
-        if not out:
+        # Wait for further closing deals while history is still catching up.
+        if new and meta.partial_volume < meta.lot - 1e-9:
             return (None, None, None)
 
-        profit = 0.0
-        px_num = 0.0
-        px_den = 0.0
-        for d in out:
-            vol = float(getattr(d, "volume", 0.0) or 0.0)
-            price = float(getattr(d, "price", 0.0) or 0.0)
-            p = float(getattr(d, "profit", 0.0) or 0.0)
-            c = float(getattr(d, "commission", 0.0) or 0.0)
-            s = float(getattr(d, "swap", 0.0) or 0.0)
-            profit += (p + c + s)
-
-            if vol > 0 and price > 0:
-                px_num += price * vol
-                px_den += vol
-
+        profit = meta.partial_profit
+        px_num = meta.partial_px_num
+        px_den = meta.partial_px_den
         exit_px = (px_num / px_den) if px_den else None
         reason = "CLOSED"
-        if exit_px is not None and meta.tp and abs(exit_px - meta.tp) <= (abs(meta.tp) * 0.0005):
+        if exit_px is not None and meta.tp_tol is not None and abs(exit_px - meta.tp) <= meta.tp_tol:
             reason = "TP"
-        if exit_px is not None and meta.sl and abs(exit_px - meta.sl) <= (abs(meta.sl) * 0.0005):
+        if exit_px is not None and meta.sl_tol is not None and abs(exit_px - meta.sl) <= meta.sl_tol:
             reason = "SL"
         return (profit, exit_px, reason)
 
+    @staticmethod
+    def _sum_deals(deals: List[Any]):
+        # TradeDeal always carries these fields, so read them directly.
+        fields = getattr(type(deals[0]), "_fields", None)
+        if fields is not None and len(deals) >= NJIT_MIN_DEALS:
+            # Pull each column out of the named tuples at C speed, then sum in one pass.
+            n = len(deals)
+            return _sum_deal_cols(
+                *(np.fromiter(map(itemgetter(fields.index(f)), deals), dtype=np.float64, count=n)
+                  for f in ("profit", "commission", "swap", "price", "volume"))
+            )
+        profit = sum(d.profit + d.commission + d.swap for d in deals)
+        priced = [d for d in deals if d.volume > 0 and d.price > 0]
+        px_num = sum(d.price * d.volume for d in priced)
+        px_den = sum(d.volume for d in priced)
+        return profit, px_num, px_den, sum(d.volume for d in deals)
+
     def _notify_exit(
         self,
         meta: TradeMeta,
@@ -202,14 +303,19 @@ class TradeTracker:
     ) -> None:
         if not self.notifier.cfg.notify_exit:
             return
-        txt = (
-            f"EXIT ({reason})\n"
-            f"Mode: {meta.mode} | Source: {meta.source}\n"
-            f"{meta.symbol} {meta.side} tf={meta.tf}\n"
-            f"Entry: {meta.entry_price:.5f}\n"
-            f"Exit:  {(exit_px if exit_px is not None else 0.0):.5f}\n"
-            f"PnL:   {profit_ccy:.2f}\n"
-            f"R:     {r_mult:.2f}R\n"
-            f"Dur:   {dur_sec // 60}m\n"
+        txt = _EXIT_FMT.format_map(
+            {
+                "reason": reason,
+                "mode": meta.mode,
+                "source": meta.source,
+                "symbol": meta.symbol,
+                "side": meta.side,
+                "tf": meta.tf,
+                "entry": meta.entry_price,
+                "exit": exit_px if exit_px is not None else 0.0,
+                "pnl": profit_ccy,
+                "r": r_mult,
+                "dur_min": dur_sec // 60,
+            }
         )
         self.notifier.send(txt, key=f"exit:{meta.symbol}")
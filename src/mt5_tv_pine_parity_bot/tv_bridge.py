@@ -1,15 +1,43 @@
 from __future__ import annotations
 
+import asyncio
+import hmac
+import json
+import time
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Any, Awaitable, Callable, Dict, Optional
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 
 from aiohttp import web
 
+try:
+    import orjson as _json
+except ImportError:  # optional speedup; stdlib json parses the same payloads
+    import json as _json
+
 from .utils.logger import setup_logger
 
 log = setup_logger("tv_bridge")
 
-@dataclass
+# Reject notifications are queued and sent off the request path; at most one per
+# (client IP, reason) every REJECT_NOTIFY_GAP seconds, and new ones are dropped when full.
+REJECT_QUEUE_SIZE = 1024
+REJECT_NOTIFY_GAP = 1.0
+
+# Rejections without extra fields always send the same body; encode them once.
+_ERR_BODIES: Dict[str, bytes] = {
+    reason: json.dumps({"ok": False, "error": reason}).encode("utf-8")
+    for reason in (
+        "method_not_allowed",
+        "invalid_json",
+        "invalid_payload",
+        "bad_secret",
+        "side_not_supported",
+        "missing_tf",
+    )
+}
+
+@dataclass(slots=True)
 class TVSignal:
     secret: str
     symbol: str
@@ -20,25 +48,21 @@ class TVSignal:
     raw: Dict[str, Any]
 
 def _fval(d: Dict[str, Any], key: str) -> Optional[float]:
-    if key not in d:
-        return None
     v = d.get(key)
     if v is None:
         return None
     try:
         return float(v)
-    except Exception:
+    except (TypeError, ValueError, OverflowError):
         return None
 
 def _ival(d: Dict[str, Any], key: str) -> Optional[int]:
-    if key not in d:
-        return None
     v = d.get(key)
     if v is None:
         return None
     try:
         return int(v)
-    except Exception:
+    except (TypeError, ValueError, OverflowError):
         return None
 
 def parse_tv_signal(payload: Dict[str, Any]) -> TVSignal:
@@ -72,14 +96,64 @@ async def start_server(
     on_reject: Optional[Callable[[str, Dict[str, Any], str], Awaitable[None]]] = None,
 ) -> web.AppRunner:
     app = web.Application()
+    secret_b = secret.encode("utf-8")
+
+    reject_q: Optional[asyncio.Queue] = None
+    # Oldest notification first, so stale entries are evicted from the front.
+    last_reject: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+    if on_reject is not None:
+        reject_q = asyncio.Queue(maxsize=REJECT_QUEUE_SIZE)
+        drain_tasks = []
+
+        async def drain_rejects() -> None:
+            while True:
+                reason, payload, ip = await reject_q.get()
+                try:
+                    await on_reject(reason, payload, ip)
+                except Exception as e:
+                    log.error("reject handler failed: %s", e)
+
+        async def start_drain(_app: web.Application) -> None:
+            drain_tasks.append(asyncio.create_task(drain_rejects()))
+
+        async def stop_drain(_app: web.Application) -> None:
+            for t in drain_tasks:
+                t.cancel()
+            await asyncio.gather(*drain_tasks, return_exceptions=True)
+
+        app.on_startup.append(start_drain)
+        app.on_cleanup.append(stop_drain)
+
+    def queue_reject(reason: str, payload: Dict[str, Any], ip: str) -> None:
+        # Keyed per reason too: behind a reverse proxy every client shares one address.
+        key = (ip, reason)
+        now = time.monotonic()
+        last = last_reject.get(key)
+        if last is not None and now - last < REJECT_NOTIFY_GAP:
+            return
+        last_reject.pop(key, None)
+        while last_reject:
+            oldest_key, oldest = next(iter(last_reject.items()))
+            if now - oldest < REJECT_NOTIFY_GAP:
+                break
+            del last_reject[oldest_key]
+        if len(last_reject) >= REJECT_QUEUE_SIZE:
+            # Every tracked pair was notified within the gap: shed this one.
+            return
+        last_reject[key] = now
+        try:
+            reject_q.put_nowait((reason, payload, ip))
+        except asyncio.QueueFull:
+            pass
 
     async def handler(request: web.Request) -> web.Response:
         async def reject(reason: str, status: int, payload: Optional[Dict[str, Any]] = None, extra: Optional[Dict[str, Any]] = None):
-            if on_reject is not None:
-                try:
-                    await on_reject(reason, payload or {}, request.remote or "")
-                except Exception as e:
-                    log.error(f"reject handler failed: {e}")
+            if reject_q is not None:
+                queue_reject(reason, payload or {}, request.remote or "")
+            if not extra and reason in _ERR_BODIES:
+                return web.Response(
+                    body=_ERR_BODIES[reason], status=status, content_type="application/json", charset="utf-8"
+                )
             body = {"ok": False, "error": reason}
             if extra:
                 body.update(extra)
@@ -88,15 +162,19 @@ async def start_server(
         if request.method != "POST":
             return await reject("method_not_allowed", 405)
         try:
-            payload = await request.json()
+            # Parse the raw bytes directly; skips aiohttp's text decode step.
+            payload = _json.loads(await request.read())
         except Exception:
             return await reject("invalid_json", 400)
         if not isinstance(payload, dict):
             return await reject("invalid_payload", 400)
 
-        sig = parse_tv_signal(payload)
-        if not sig.secret or sig.secret != secret:
+        # Constant-time check, done before the rest of the payload is parsed.
+        provided = str(payload.get("secret", "")).strip()
+        if not provided or not hmac.compare_digest(provided.encode("utf-8", "surrogatepass"), secret_b):
             return await reject("bad_secret", 401, payload=payload)
+
+        sig = parse_tv_signal(payload)
         if sig.side != "LONG":
             return await reject("side_not_supported", 400, payload=payload)
 
@@ -114,5 +192,5 @@ async def start_server(
     await runner.setup()
     site = web.TCPSite(runner, host=host, port=port)
     await site.start()
-    log.info(f"TV bridge listening on http://{host}:{port}{path}")
+    log.info("TV bridge listening on http://%s:%s%s", host, port, path)
     return runner
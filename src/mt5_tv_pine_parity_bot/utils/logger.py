@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-import logging
 import sys
 
+try:
+    import picologging as logging
+except ImportError:  # optional C implementation of the stdlib logging API
+    import logging
+
 def setup_logger(name: str = "bot", level: str = "INFO") -> logging.Logger:
     logger = logging.getLogger(name)
     if logger.handlers:
@@ -1,9 +1,12 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from time import time_ns
+
+_UTC = timezone.utc
 
 def ms_to_iso(ms: int) -> str:
-    return datetime.fromtimestamp(ms / 1000.0, tz=timezone.utc).isoformat()
+    return datetime.fromtimestamp(ms / 1000.0, tz=_UTC).isoformat()
 
 def now_ms() -> int:
-    return int(datetime.now(tz=timezone.utc).timestamp() * 1000)
+    return time_ns() // 1_000_000